@@ -13,3 +13,16 @@ WEBHOOK_URL = os.getenv("WEBHOOK_URL")
 WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
 
 MAX_API_BASE = "https://platform-api.max.ru"
+
+# Планировщик задач (значения проверяет FairScheduler при создании)
+WORKERS = int(os.getenv("WORKERS", "3"))                            # потоки для тяжёлых загрузок
+CHAT_MAX_INFLIGHT = int(os.getenv("CHAT_MAX_INFLIGHT", "1"))        # одновременных загрузок на чат
+CHAT_MAX_QUEUED = int(os.getenv("CHAT_MAX_QUEUED", "10"))           # ссылок в очереди на чат
+CHAT_RATE_PER_MIN = float(os.getenv("CHAT_RATE_PER_MIN", "6"))      # пополнение token bucket
+CHAT_BURST = int(os.getenv("CHAT_BURST", "5"))                      # ёмкость token bucket
+CHAT_MAX_FAST_QUEUED = int(os.getenv("CHAT_MAX_FAST_QUEUED", "5"))  # ответов/команд в очереди на чат
+# Веса чатов для справедливой очереди: "chat_id:weight,chat_id:weight"
+CHAT_WEIGHTS = {
+    int(k): float(v)
+    for k, v in (pair.split(":") for pair in os.getenv("CHAT_WEIGHTS", "").split(",") if pair.strip())
+}
@@ -4,17 +4,60 @@ import tempfile
 import requests
 import json
 import logging
+import shutil
+import threading
+from contextlib import contextmanager
 from typing import List, Dict, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+COOKIE_FILE = "cookies.txt"
+_cookie_lock = threading.Lock()  # общий COOKIE_FILE читают и пишут параллельные загрузчики
+
 class MediaDownloader:
     def __init__(self, temp_dir: Optional[str] = None):
         self.temp_dir = temp_dir or tempfile.mkdtemp()
+        self.cookiefile = os.path.join(self.temp_dir, COOKIE_FILE) if os.path.exists(COOKIE_FILE) else None
+
+    @contextmanager
+    def _ydl(self, ydl_opts: Dict):
+        # yt-dlp перезаписывает cookiefile при закрытии YoutubeDL, а ссылки
+        # обрабатываются параллельно: каждый загрузчик работает со своей копией,
+        # свежей на момент вызова, и обновлённые cookies пишет обратно в COOKIE_FILE
+        cookiefile = self._copy_cookies()
+        try:
+            with yt_dlp.YoutubeDL(dict(ydl_opts, cookiefile=cookiefile)) as ydl:
+                yield ydl
+        finally:
+            if cookiefile:
+                self._save_cookies()
+
+    def _copy_cookies(self) -> Optional[str]:
+        # без cookies загрузка ещё может пройти - ошибка копии не должна её ронять
+        if not self.cookiefile:
+            return None
+        try:
+            with _cookie_lock:
+                shutil.copyfile(COOKIE_FILE, self.cookiefile)
+            return self.cookiefile
+        except Exception as e:
+            logger.error(f"❌ Failed to copy {COOKIE_FILE}: {e}")
+            return None
+
+    def _save_cookies(self):
+        if not os.path.exists(self.cookiefile):
+            return
+        try:
+            with _cookie_lock:
+                tmp = f"{COOKIE_FILE}.{threading.get_ident()}.tmp"
+                shutil.copyfile(self.cookiefile, tmp)
+                os.replace(tmp, COOKIE_FILE)
+        except Exception as e:
+            logger.error(f"❌ Failed to save cookies to {COOKIE_FILE}: {e}")
 
     def extract_info(self, url: str) -> Dict:
-        ydl_opts = {"quiet": True, "no_warnings": True, "cookiefile": "cookies.txt"}
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        ydl_opts = {"quiet": True, "no_warnings": True}
+        with self._ydl(ydl_opts) as ydl:
             info = ydl.extract_info(url, download=False)
             # Логируем структуру (только ключи, чтобы не засорять)
             logger.error(f"Extracted info keys for {url}: {list(info.keys())}")
@@ -39,14 +82,13 @@ class MediaDownloader:
                     "outtmpl": os.path.join(self.temp_dir, "%(title)s.%(ext)s"),
                     "quiet": True,
                     "no_warnings": True,
-                    "cookiefile": "cookies.txt",
                 }
                 # Если требуется слияние, но ffmpeg отсутствует, можно пропустить
                 if strat["merge"]:
                     # Проверим наличие ffmpeg (опционально)
                     pass  # пока просто пробуем
             
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                with self._ydl(ydl_opts) as ydl:
                     info = ydl.extract_info(url, download=True)
                     filename = ydl.prepare_filename(info)
                     return filename, info
@@ -111,5 +153,4 @@ class MediaDownloader:
         return "\n\n".join(parts) if parts else None
 
     def cleanup(self):
-        import shutil
         shutil.rmtree(self.temp_dir, ignore_errors=True)
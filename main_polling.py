@@ -1,11 +1,16 @@
 import os
 import time
 import logging
-from config import MAX_BOT_TOKEN, YANDEX_DISK_TOKEN, DONATE_URL
+from config import (
+    MAX_BOT_TOKEN, YANDEX_DISK_TOKEN, DONATE_URL,
+    WORKERS, CHAT_MAX_INFLIGHT, CHAT_MAX_QUEUED, CHAT_RATE_PER_MIN, CHAT_BURST, CHAT_WEIGHTS,
+    CHAT_MAX_FAST_QUEUED,
+)
 from max_client import MaxBotClient
 from downloader import MediaDownloader
 from yandex_disk import YandexDiskUploader
 from utils import TempDir
+from scheduler import FairScheduler, ACCEPTED, RATE_LIMITED
 import traceback
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -48,12 +53,42 @@ yandex = YandexDiskUploader(YANDEX_DISK_TOKEN) if YANDEX_DISK_TOKEN else None
 
 user_state = {}  # chat_id -> state
 
+scheduler = FairScheduler(
+    workers=WORKERS,
+    max_inflight=CHAT_MAX_INFLIGHT,
+    max_queued=CHAT_MAX_QUEUED,
+    rate_per_min=CHAT_RATE_PER_MIN,
+    burst=CHAT_BURST,
+    weights=CHAT_WEIGHTS,
+    max_fast_queued=CHAT_MAX_FAST_QUEUED,
+)
+
+WELCOME_TEXT = (
+    "Привет! Я бот для скачивания видео, изображений и описаний из постов.\n"
+    "Просто отправь мне ссылку на пост, и я пришлю тебе контент."
+)
+
+def send_text(chat_id: int, text: str):
+    max_bot.send_message(chat_id, text)
+
+def enqueue_link(chat_id: int, link: str):
+    status, position = scheduler.submit_heavy(chat_id, process_link, link)
+    if status == ACCEPTED:
+        logger.info(f"📥 Link from chat {chat_id} queued at position {position}")
+        scheduler.submit_fast(chat_id, send_text, f"⏳ Ссылка принята, позиция в очереди: {position}")
+    elif not scheduler.claim_notice(chat_id):
+        logger.info(f"Link from chat {chat_id} rejected ({status}), notice already sent")
+    elif status == RATE_LIMITED:
+        scheduler.submit_fast(chat_id, send_text, "🐢 Слишком много ссылок подряд. Подождите немного и отправьте снова.")
+    else:
+        scheduler.submit_fast(chat_id, send_text, "📛 У вас уже много ссылок в очереди. Дождитесь их обработки.")
+
 def process_link(chat_id: int, link: str):
     max_bot.send_action(chat_id, "typing_on")
     temp = TempDir()
-    downloader = MediaDownloader(temp.path)
 
     try:
+        downloader = MediaDownloader(temp.path)
         info = downloader.extract_info(link)
         logger.error(f"Duration from info: {info.get('duration')}")
         files_to_send = []
@@ -246,7 +281,7 @@ def process_link(chat_id: int, link: str):
         logger.error(f"🔥 Error: {traceback.format_exc()}")
         max_bot.send_message(chat_id, "❌ Произошла ошибка при обработке ссылки. Попробуйте другую.")
     finally:
-        downloader.cleanup()
+        temp.cleanup()
         logger.info("🧹 Temporary files cleaned up")
 
 def handle_update(update):
@@ -283,32 +318,25 @@ def handle_update(update):
 
         # Обработка команд и ссылок
         if text.startswith("http"):
-            process_link(chat_id, text)
+            enqueue_link(chat_id, text)
         elif text == "/start":
-            welcome = (
-                "Привет! Я бот для скачивания видео, изображений и описаний из постов.\n"
-                "Просто отправь мне ссылку на пост, и я пришлю тебе контент."
-            )
-            max_bot.send_message(chat_id, welcome)
+            scheduler.submit_fast(chat_id, send_text, WELCOME_TEXT)
         else:
-            max_bot.send_message(chat_id, "Отправьте ссылку для обработки или /start для начала.")
+            scheduler.submit_fast(chat_id, send_text, "Отправьте ссылку для обработки или /start для начала.")
 
-        # Добавляем mid в обработанные (после успешной обработки)
+        # Добавляем mid в обработанные (после постановки в очередь)
         if mid:
             processed_mids.add(mid)
 
     elif update_type == "bot_started":
         chat_id = update.get("chat_id")
         if chat_id:
-            welcome = (
-                "Привет! Я бот для скачивания видео, изображений и описаний из постов.\n"
-                "Просто отправь мне ссылку на пост, и я пришлю тебе контент."
-            )
-            max_bot.send_message(chat_id, welcome)
+            scheduler.submit_fast(chat_id, send_text, WELCOME_TEXT)
 
 def main():
     logger.info("Starting MAX bot (polling mode)...")
     marker = load_marker()
+    scheduler.start()
     try:
         with open(MARKER_FILE, "a") as f:
             f.write("")
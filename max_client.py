@@ -3,6 +3,7 @@ import time
 import logging
 import os
 import shutil
+import threading
 import xml.etree.ElementTree as ET
 from typing import Optional, Dict, Any, List
 from config import MAX_BOT_TOKEN, MAX_API_BASE
@@ -15,8 +16,17 @@ class MaxBotClient:
     def __init__(self, token: str):
         self.token = token
         self.base_url = MAX_API_BASE
-        self.session = requests.Session()
-        self.session.headers.update({"Authorization": token})
+        self._local = threading.local()
+
+    @property
+    def session(self) -> requests.Session:
+        # requests.Session не гарантирует потокобезопасность - своя сессия на поток
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update({"Authorization": self.token})
+            self._local.session = session
+        return session
 
     def _request(self, method: str, path: str, **kwargs) -> Dict[str, Any]:
         url = f"{self.base_url}{path}"
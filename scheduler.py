@@ -0,0 +1,267 @@
+import threading
+import time
+import logging
+from collections import deque
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ACCEPTED = "accepted"
+RATE_LIMITED = "rate_limited"
+QUEUE_FULL = "queue_full"
+
+EVICT_INTERVAL = 60.0  # как часто чистить состояние неактивных чатов, сек
+
+
+class TokenBucket:
+    def __init__(self, rate_per_sec: float, capacity: int, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate_per_sec
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = float(capacity)
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def is_full(self) -> bool:
+        self._refill()
+        return self.tokens >= self.capacity
+
+    def take(self) -> bool:
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class _Task:
+    __slots__ = ("chat_id", "func", "args", "tag", "seq")
+
+    def __init__(self, chat_id: int, func: Callable, args: tuple, tag: float, seq: int):
+        self.chat_id = chat_id
+        self.func = func
+        self.args = args
+        self.tag = tag
+        self.seq = seq
+
+
+class FairScheduler:
+    """
+    Справедливая очередь задач по чатам.
+
+    Тяжёлые задачи (ссылки) раздаются по self-clocked weighted fair queuing:
+    каждой задаче присваивается виртуальное время завершения
+    max(V, last_tag[chat]) + 1 / weight, воркер берёт задачу с наименьшим
+    тегом среди чатов, не превысивших лимит одновременных загрузок.
+    На входе работают token bucket и лимит длины очереди на чат.
+
+    Быстрые задачи (команды) идут отдельной полосой: их обслуживает
+    выделенный поток, а тяжёлые воркеры берут их в первую очередь.
+    Внутри полосы чаты обслуживаются по кругу, очередь чата ограничена,
+    и у чата выполняется не больше одной быстрой задачи - ответы не перемешиваются.
+    """
+
+    def __init__(self, workers: int, max_inflight: int, max_queued: int,
+                 rate_per_min: float, burst: int, weights: Optional[Dict[int, float]] = None,
+                 max_fast_queued: int = 5, clock: Callable[[], float] = time.monotonic):
+        # счётчик меньше 1 - ссылки принимаются, но не выполняются; вес 0 - деление
+        # на ноль, отрицательный вес - вечный приоритет чата
+        counts = dict(workers=workers, max_inflight=max_inflight, max_queued=max_queued,
+                      burst=burst, max_fast_queued=max_fast_queued)
+        for name, value in counts.items():
+            if value < 1:
+                raise ValueError(f"{name} must be >= 1, got {value}")
+        if rate_per_min <= 0:
+            raise ValueError(f"rate_per_min must be > 0, got {rate_per_min}")
+        for chat_id, weight in (weights or {}).items():
+            if weight <= 0:
+                raise ValueError(f"weight for chat {chat_id} must be > 0, got {weight}")
+        self.workers = workers
+        self.max_inflight = max_inflight
+        self.max_queued = max_queued
+        self.rate_per_sec = rate_per_min / 60.0
+        self.burst = burst
+        self.weights = weights or {}
+        self.max_fast_queued = max_fast_queued
+        self.clock = clock
+
+        self._cond = threading.Condition()
+        self._fast: Dict[int, deque] = {}     # chat_id -> быстрые задачи, порядок ключей = круг
+        self._fast_busy = set()               # чаты, чья быстрая задача сейчас выполняется
+        self._heavy: Dict[int, deque] = {}    # chat_id -> очередь задач
+        self._last_tag: Dict[int, float] = {}
+        self._inflight: Dict[int, int] = {}
+        self._buckets: Dict[int, TokenBucket] = {}
+        self._notified_until: Dict[int, float] = {}
+        self._vtime = 0.0
+        self._seq = 0
+        self._next_evict = clock() + EVICT_INTERVAL
+
+    def start(self):
+        self._spawn(self._fast_loop, "sched-fast")
+        for i in range(self.workers):
+            self._spawn(self._heavy_loop, f"sched-worker-{i}")
+        logger.info(f"🗂️ Scheduler started with {self.workers} workers")
+
+    def _spawn(self, target: Callable, name: str):
+        threading.Thread(target=target, name=name, daemon=True).start()
+
+    def submit_fast(self, chat_id: int, func: Callable, *args) -> bool:
+        """Ставит быструю задачу. False - очередь чата переполнена, задача отброшена."""
+        with self._cond:
+            queue = self._fast.get(chat_id)
+            if queue is None:
+                queue = self._fast[chat_id] = deque()
+            elif len(queue) >= self.max_fast_queued:
+                logger.info(f"Fast lane full for chat {chat_id}, dropping task")
+                return False
+            queue.append(_Task(chat_id, func, args, 0.0, self._next_seq()))
+            self._cond.notify_all()
+            return True
+
+    def claim_notice(self, chat_id: int) -> bool:
+        """True не чаще раза за окно пополнения bucket - чтобы не слать отказ на каждую ссылку."""
+        with self._cond:
+            now = self.clock()
+            if now < self._notified_until.get(chat_id, 0.0):
+                return False
+            self._notified_until[chat_id] = now + 1.0 / self.rate_per_sec
+            return True
+
+    def submit_heavy(self, chat_id: int, func: Callable, *args) -> Tuple[str, int]:
+        """Ставит задачу в очередь. Возвращает (статус, позиция в очереди)."""
+        with self._cond:
+            self._maybe_evict()
+            queue = self._heavy.get(chat_id)
+            if queue is not None and len(queue) >= self.max_queued:
+                return QUEUE_FULL, 0
+            bucket = self._buckets.get(chat_id)
+            if bucket is None:
+                bucket = self._buckets[chat_id] = TokenBucket(self.rate_per_sec, self.burst, self.clock)
+            if not bucket.take():
+                return RATE_LIMITED, 0
+
+            weight = self.weights.get(chat_id, 1.0)
+            tag = max(self._vtime, self._last_tag.get(chat_id, 0.0)) + 1.0 / weight
+            self._last_tag[chat_id] = tag
+            task = _Task(chat_id, func, args, tag, self._next_seq())
+            self._heavy.setdefault(chat_id, deque()).append(task)
+            position = 1 + sum(
+                1 for q in self._heavy.values() for t in q
+                if (t.tag, t.seq) < (task.tag, task.seq)
+            )
+            self._cond.notify_all()
+            return ACCEPTED, position
+
+    def _next_seq(self) -> int:
+        self._seq += 1
+        return self._seq
+
+    def _maybe_evict(self):
+        now = self.clock()
+        if now < self._next_evict:
+            return
+        self._next_evict = now + EVICT_INTERVAL
+        self._evict_idle()
+
+    def _evict_idle(self):
+        # чат без задач и с полным bucket ничем не отличается от нового
+        for chat_id in list(self._buckets):
+            if chat_id in self._heavy or chat_id in self._inflight:
+                continue
+            if self._buckets[chat_id].is_full():
+                del self._buckets[chat_id]
+        now = self.clock()
+        for chat_id in [c for c, until in self._notified_until.items() if until <= now]:
+            del self._notified_until[chat_id]
+
+    def _pick_heavy(self) -> Optional[_Task]:
+        best = None
+        for chat_id, queue in self._heavy.items():
+            if not queue or self._inflight.get(chat_id, 0) >= self.max_inflight:
+                continue
+            head = queue[0]
+            if best is None or (head.tag, head.seq) < (best.tag, best.seq):
+                best = head
+        if best is None:
+            return None
+        queue = self._heavy[best.chat_id]
+        queue.popleft()
+        if not queue:
+            del self._heavy[best.chat_id]
+        # из-за лимита in-flight теги выбираются не строго по порядку - V не должно убывать
+        self._vtime = max(self._vtime, best.tag)
+        self._inflight[best.chat_id] = self._inflight.get(best.chat_id, 0) + 1
+        return best
+
+    def _pop_fast(self) -> Optional[_Task]:
+        for chat_id in self._fast:
+            if chat_id not in self._fast_busy:
+                break
+        else:
+            return None
+        queue = self._fast.pop(chat_id)
+        task = queue.popleft()
+        if queue:
+            self._fast[chat_id] = queue  # в конец круга
+        self._fast_busy.add(chat_id)
+        return task
+
+    def _fast_done(self, chat_id: int):
+        with self._cond:
+            self._fast_busy.discard(chat_id)
+            self._cond.notify_all()
+
+    def _fast_loop(self):
+        while True:
+            with self._cond:
+                while True:
+                    task = self._pop_fast()
+                    if task is not None:
+                        break
+                    self._cond.wait()
+            try:
+                self._run(task)
+            finally:
+                self._fast_done(task.chat_id)
+
+    def _heavy_loop(self):
+        while True:
+            with self._cond:
+                while True:
+                    task, heavy = self._pop_fast(), False
+                    if task is not None:
+                        break
+                    task, heavy = self._pick_heavy(), True
+                    if task is not None:
+                        break
+                    self._cond.wait()
+            try:
+                self._run(task)
+            finally:
+                if heavy:
+                    self._finish(task.chat_id)
+                else:
+                    self._fast_done(task.chat_id)
+
+    def _finish(self, chat_id: int):
+        with self._cond:
+            left = self._inflight.get(chat_id, 1) - 1
+            if left > 0:
+                self._inflight[chat_id] = left
+            else:
+                self._inflight.pop(chat_id, None)
+                if chat_id not in self._heavy:
+                    self._last_tag.pop(chat_id, None)
+            self._cond.notify_all()
+
+    @staticmethod
+    def _run(task: _Task):
+        try:
+            task.func(task.chat_id, *task.args)
+        except Exception:
+            logger.exception(f"🔥 Task for chat {task.chat_id} failed")
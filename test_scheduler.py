@@ -0,0 +1,200 @@
+import threading
+import time
+
+import pytest
+
+from scheduler import FairScheduler, TokenBucket, ACCEPTED, RATE_LIMITED, QUEUE_FULL, EVICT_INTERVAL
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def make(clock=time.monotonic, **kwargs):
+    params = dict(workers=1, max_inflight=1, max_queued=10, rate_per_min=60, burst=10)
+    params.update(kwargs)
+    return FairScheduler(clock=clock, **params)
+
+
+def noop(chat_id, *args):
+    pass
+
+
+class Recorder:
+    """Задача, которая запоминает порядок запусков и сообщает, когда их набралось `expected`."""
+
+    def __init__(self, expected):
+        self.expected = expected
+        self.calls = []
+        self.done = threading.Event()
+        self._lock = threading.Lock()
+
+    def __call__(self, chat_id, label=None, delay=0.0):
+        time.sleep(delay)
+        with self._lock:
+            self.calls.append(chat_id if label is None else (chat_id, label))
+            if len(self.calls) == self.expected:
+                self.done.set()
+
+    def wait(self):
+        assert self.done.wait(5), f"only {len(self.calls)} of {self.expected} tasks ran"
+        return self.calls
+
+
+def run_heavy(sched, submits):
+    """Ставит ссылки до старта единственного воркера и возвращает порядок их выполнения."""
+    rec = Recorder(len(submits))
+    for chat_id in submits:
+        assert sched.submit_heavy(chat_id, rec)[0] == ACCEPTED
+    sched.start()
+    return rec.wait()
+
+
+def test_fair_interleaving(clock):
+    sched = make(clock)
+    assert [sched.submit_heavy(1, noop) for _ in range(4)] == [(ACCEPTED, p) for p in (1, 2, 3, 4)]
+    # второй чат встаёт между ссылками первого, а не за всеми ними
+    assert [sched.submit_heavy(2, noop) for _ in range(2)] == [(ACCEPTED, 2), (ACCEPTED, 4)]
+
+
+def test_fair_interleaving_with_worker(clock):
+    assert run_heavy(make(clock), [1, 1, 1, 1, 2, 2]) == [1, 2, 1, 2, 1, 1]
+
+
+def test_weights(clock):
+    order = run_heavy(make(clock, weights={2: 2.0}), [1, 2] * 4)
+    assert order == [2, 1, 2, 2, 1, 2, 1, 1]
+
+
+def test_queue_full(clock):
+    sched = make(clock, max_queued=2)
+    assert sched.submit_heavy(1, noop)[0] == ACCEPTED
+    assert sched.submit_heavy(1, noop)[0] == ACCEPTED
+    assert sched.submit_heavy(1, noop) == (QUEUE_FULL, 0)
+    assert sched.submit_heavy(2, noop)[0] == ACCEPTED
+
+
+def test_rate_limited(clock):
+    sched = make(clock, rate_per_min=6, burst=2)
+    assert sched.submit_heavy(1, noop)[0] == ACCEPTED
+    assert sched.submit_heavy(1, noop)[0] == ACCEPTED
+    assert sched.submit_heavy(1, noop) == (RATE_LIMITED, 0)
+    assert sched.submit_heavy(2, noop)[0] == ACCEPTED
+    clock.now += 10  # 6 в минуту - один токен за 10 секунд
+    assert sched.submit_heavy(1, noop)[0] == ACCEPTED
+    assert sched.submit_heavy(1, noop) == (RATE_LIMITED, 0)
+
+
+def test_token_bucket(clock):
+    bucket = TokenBucket(rate_per_sec=0.5, capacity=2, clock=clock)
+    assert [bucket.take() for _ in range(3)] == [True, True, False]
+    assert not bucket.is_full()
+    clock.now += 2
+    assert bucket.take()
+    clock.now += 10
+    assert bucket.is_full()
+
+
+def test_rejected_submit_leaves_no_state(clock):
+    sched = make(clock, rate_per_min=6, burst=1)
+    sched.submit_heavy(1, noop)
+    sched._finish(sched._pick_heavy().chat_id)
+    assert sched.submit_heavy(1, noop) == (RATE_LIMITED, 0)
+    assert sched._heavy == {}
+    assert sched._last_tag == {}
+
+
+def test_vtime_never_goes_backwards(clock):
+    sched = make(clock, weights={2: 0.25})
+    for _ in range(5):
+        sched.submit_heavy(1, noop)         # теги 1..5
+    sched.submit_heavy(2, noop)             # тег 4
+    seen = []
+    first = sched._pick_heavy()             # чат 1 @1
+    seen.append(sched._vtime)
+    second = sched._pick_heavy()            # чат 1 на лимите in-flight -> чат 2 @4
+    assert (first.chat_id, second.chat_id) == (1, 2)
+    seen.append(sched._vtime)
+    sched._finish(1)
+    third = sched._pick_heavy()             # чат 1 @2, тег меньше уже выданного
+    assert third.tag < second.tag
+    seen.append(sched._vtime)
+    assert seen == sorted(seen)
+    # новая ссылка получает тег 5 и встаёт за чатом 1 @3, @4, @5, а не перед ними
+    assert sched.submit_heavy(3, noop) == (ACCEPTED, 4)
+
+
+def test_idle_buckets_evicted(clock):
+    sched = make(clock, rate_per_min=6, burst=1)
+    sched.submit_heavy(1, noop)
+    sched._finish(sched._pick_heavy().chat_id)
+    clock.now += EVICT_INTERVAL
+    sched.submit_heavy(2, noop)             # запускает чистку
+    assert 1 not in sched._buckets
+    assert 2 in sched._buckets
+
+
+def test_fast_lane_cap(clock):
+    sched = make(clock, max_fast_queued=2)
+    assert [sched.submit_fast(1, noop) for _ in range(4)] == [True, True, False, False]
+    assert sched.submit_fast(2, noop)
+
+
+def test_claim_notice_once_per_window(clock):
+    sched = make(clock, rate_per_min=6)
+    assert sched.claim_notice(1)
+    assert not sched.claim_notice(1)
+    assert sched.claim_notice(2)
+    clock.now += 10
+    assert sched.claim_notice(1)
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"workers": 0},
+    {"max_inflight": 0},
+    {"max_queued": 0},
+    {"burst": 0},
+    {"max_fast_queued": 0},
+    {"rate_per_min": 0},
+    {"weights": {1: 0}},
+    {"weights": {1: -1}},
+])
+def test_invalid_settings_rejected(kwargs):
+    with pytest.raises(ValueError):
+        make(**kwargs)
+
+
+def test_fast_tasks_of_one_chat_run_in_order():
+    sched = make(workers=3)
+    rec = Recorder(4)
+    sched.submit_fast(1, rec, "pos 1", 0.2)
+    sched.submit_fast(1, rec, "pos 2")
+    sched.submit_fast(1, rec, "pos 3")
+    sched.submit_fast(2, rec, "start")
+    sched.start()
+    delivered = rec.wait()
+    assert [label for chat_id, label in delivered if chat_id == 1] == ["pos 1", "pos 2", "pos 3"]
+    # второй чат не ждёт медленный ответ первого
+    assert delivered[0] == (2, "start")
+
+
+def test_fast_lane_not_blocked_by_heavy_tasks():
+    sched = make(workers=1)
+    release = threading.Event()
+    sched.submit_heavy(1, lambda chat_id: release.wait(5))
+    sched.start()
+    rec = Recorder(1)
+    sched.submit_fast(2, rec, "start")
+    try:
+        assert rec.wait() == [(2, "start")]
+    finally:
+        release.set()
@@ -1,5 +1,7 @@
 import yadisk
 import os
+import threading
+import uuid
 from typing import Optional
 from config import YANDEX_DISK_TOKEN
 
@@ -9,14 +11,19 @@ class YandexDiskUploader:
         self.y = yadisk.YaDisk(token=token)
         if not self.y.check_token():
             raise ValueError("Invalid Yandex Disk token")
+        # загрузки идут из нескольких потоков планировщика: создание папки под
+        # блокировкой, сами загрузки параллельно (имена уникальны)
+        self._mkdir_lock = threading.Lock()
 
     def upload_file(self, file_path: str, remote_path: str = "/bots_temp/") -> Optional[str]:
-        filename = os.path.basename(file_path)
+        # уникальный префикс: у параллельных загрузок бывают одинаковые имена (thumbnail.jpg)
+        filename = f"{uuid.uuid4().hex[:8]}_{os.path.basename(file_path)}"
         remote_full = os.path.join(remote_path, filename).replace("\\", "/")
-        try:
-            self.y.mkdir(remote_path)
-        except:
-            pass
+        with self._mkdir_lock:
+            try:
+                self.y.mkdir(remote_path)
+            except:
+                pass
         self.y.upload(file_path, remote_full, overwrite=True)
         self.y.publish(remote_full)
         info = self.y.get_meta(remote_full)